@@ -394,13 +394,13 @@ def run_dss_to_inp(
             ]
             for pathname in pathnames:
                 ts = fid.read_ts(pathname)
-                times = np.array(ts.pytimes)
-                values = ts.values
-                # Filter nodata
+                # Convert straight to datetime64 and filter nodata with one
+                # mask; an object array of Python datetimes would be reparsed
+                # by pd.to_datetime
                 valid_mask = ~ts.nodata
-                valid_times = times[valid_mask]
-                valid_values = values[valid_mask]
-                df = pd.DataFrame({'Time': pd.to_datetime(valid_times), hms_id: valid_values}).set_index('Time')
+                ts_index = pd.DatetimeIndex(np.asarray(ts.pytimes, dtype='datetime64[s]')[valid_mask], name='Time')
+                valid_values = np.asarray(ts.values)[valid_mask]
+                df = pd.DataFrame({hms_id: valid_values}, index=ts_index)
                 composite_list.append(df)
 
         if composite_list:
@@ -432,74 +432,76 @@ def run_dss_to_inp(
 
 
 def format_timeseries(df: pd.DataFrame) -> str:
-    timeseries_str = "[TIMESERIES]\n"
-    timeseries_str += ";;Name             Date       Time       Value     \n"
-    timeseries_str += ";;-------------------------------------------------\n"
+    # Accumulate pieces in a list; repeated += on a growing string copies the
+    # whole buffer every time
+    parts = [
+        "[TIMESERIES]\n",
+        ";;Name             Date       Time       Value     \n",
+        ";;-------------------------------------------------\n",
+    ]
     for name, series in df.items():
-        timeseries_str += f"\n;;Timeseries for {name} from HMS\n"
-        for timestamp, value in series.items():
-            if pd.isna(value):
-                continue
-            date = timestamp.strftime('%m/%d/%Y')
-            time = timestamp.strftime('%H:%M')
-            timeseries_str += f"{name:<18} {date} {time}      {value:<10.5f}\n"
-    timeseries_str += "\n"
-    return timeseries_str
+        parts.append(f"\n;;Timeseries for {name} from HMS\n")
+        # Format dates and values with vectorized string kernels instead of a
+        # per-row strftime/f-string loop
+        series = series.dropna()
+        date_col = series.index.strftime('%m/%d/%Y').values.astype(str)
+        time_col = series.index.strftime('%H:%M').values.astype(str)
+        vals = np.char.mod('%-10.5f', series.to_numpy(dtype=float))
+        lines = np.char.add(f"{name:<18} ", date_col)
+        lines = np.char.add(lines, ' ')
+        lines = np.char.add(lines, time_col)
+        lines = np.char.add(lines, '      ')
+        lines = np.char.add(lines, vals)
+        lines = np.char.add(lines, '\n')
+        parts.append(''.join(lines.tolist()))
+    parts.append("\n")
+    return ''.join(parts)
 
 
 def format_inflows(ssa_ids) -> str:
-    inflow_str = "[INFLOWS]\n"
-    inflow_str += ";;                                                 Param    Units    Scale    Baseline Baseline\n"
-    inflow_str += ";;Node           Parameter        Time Series      Type     Factor   Factor   Value    Pattern\n"
-    inflow_str += ";;-------------- ---------------- ---------------- -------- -------- -------- -------- --------\n"
+    parts = [
+        "[INFLOWS]\n",
+        ";;                                                 Param    Units    Scale    Baseline Baseline\n",
+        ";;Node           Parameter        Time Series      Type     Factor   Factor   Value    Pattern\n",
+        ";;-------------- ---------------- ---------------- -------- -------- -------- -------- --------\n",
+    ]
     for ssa_id in ssa_ids:
-        inflow_str += f"{str(ssa_id):<17}FLOW             {str(ssa_id)}_ts\n"
-    inflow_str += "\n"
-    return inflow_str
+        parts.append(f"{str(ssa_id):<17}FLOW             {str(ssa_id)}_ts\n")
+    parts.append("\n")
+    return ''.join(parts)
 
 
 def replace_timeseries_in_inp_text(inp_path: Path, df: pd.DataFrame, ssa_ids) -> str:
     inp_content = inp_path.read_text(encoding='ISO-8859-1').splitlines(keepends=True)
 
-    timeseries_found = any(line.strip().startswith('[TIMESERIES]') for line in inp_content)
-    inflows_found = any(line.strip().startswith('[INFLOWS]') for line in inp_content)
-
-    # Identify sections
-    in_section = False
-    start_1_index = end_1_index = start_2_index = end_2_index = None
-
+    # Single pass: record [start, end) line indices for every section header
+    sections: Dict[str, List[int]] = {}
+    open_name = None
     for i, line in enumerate(inp_content):
-        if line.strip().startswith('[INFLOWS]') or line.strip().startswith('[TIMESERIES]'):
-            if in_section:
-                end_1_index = i
-            if start_1_index is None:
-                start_1_index = i
-            else:
-                start_2_index = i
-            in_section = True
-        elif line.strip().startswith('[') and in_section:
-            if end_1_index is None:
-                end_1_index = i
-            else:
-                end_2_index = i
-            in_section = False
+        stripped = line.strip()
+        if stripped.startswith('['):
+            if open_name is not None:
+                sections[open_name][1] = i
+            open_name = stripped.split(']', 1)[0] + ']'
+            sections[open_name] = [i, len(inp_content)]
 
     inflow_section = format_inflows(ssa_ids)
     timeseries_section = format_timeseries(df)
 
-    if not timeseries_found or not inflows_found:
-        start_2_index = end_1_index
-        end_2_index = end_1_index
-
-    if not timeseries_found and not inflows_found:
-        updated_content = inp_content + ['\n'] + [inflow_section] + [timeseries_section]
+    inflows_span = sections.get('[INFLOWS]')
+    timeseries_span = sections.get('[TIMESERIES]')
+
+    if inflows_span and timeseries_span:
+        first, second = sorted([inflows_span, timeseries_span])
+        updated_content = (inp_content[:first[0]] + [inflow_section]
+                           + inp_content[first[1]:second[0]] + [timeseries_section]
+                           + inp_content[second[1]:])
+    elif inflows_span or timeseries_span:
+        span = inflows_span or timeseries_span
+        updated_content = (inp_content[:span[0]] + [inflow_section, timeseries_section]
+                           + inp_content[span[1]:])
     else:
-        # Guard None indices
-        start_1_index = start_1_index or 0
-        end_1_index = end_1_index or start_1_index
-        start_2_index = start_2_index or end_1_index
-        end_2_index = end_2_index or start_2_index
-        updated_content = inp_content[:start_1_index] + [inflow_section] + inp_content[end_1_index:start_2_index] + [timeseries_section] + inp_content[end_2_index:]
+        updated_content = inp_content + ['\n', inflow_section, timeseries_section]
 
     return ''.join(updated_content)
 
@@ -3,9 +3,11 @@ import numpy as np
 import tkinter as tk
 from tkinter import filedialog, ttk
 import geopandas as gpd
-from shapely.geometry import LineString
+import shapely
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pydsstools.heclib.dss import HecDss
 
 
@@ -48,72 +50,74 @@ def get_file_path(file_type, ext):
 
 # Formatting functions
 def format_timeseries(df):
-    timeseries_str = "[TIMESERIES]\n"
-    timeseries_str += ";;Name             Date       Time       Value     \n"
-    timeseries_str += ";;-------------------------------------------------\n"
+    # Accumulate pieces in a list; repeated += on a growing string copies the
+    # whole buffer every time
+    parts = [
+        "[TIMESERIES]\n",
+        ";;Name             Date       Time       Value     \n",
+        ";;-------------------------------------------------\n",
+    ]
+    # Format dates and values with vectorized string kernels instead of a
+    # per-row strftime/f-string loop
+    date_col = df.index.strftime('%m/%d/%Y').values.astype(str)
+    time_col = df.index.strftime('%H:%M').values.astype(str)
     for name, series in df.items():
-        timeseries_str += f"\n;;Timeseries for {name} from HMS\n"
-        for timestamp, value in series.items():
-            date = timestamp.strftime('%m/%d/%Y')
-            time = timestamp.strftime('%H:%M')
-            timeseries_str += f"{name:<18} {date} {time}      {value:<10.5f}\n"
-    timeseries_str += "\n"
-    return timeseries_str
+        parts.append(f"\n;;Timeseries for {name} from HMS\n")
+        vals = np.char.mod('%-10.5f', series.to_numpy(dtype=float))
+        lines = np.char.add(f"{name:<18} ", date_col)
+        lines = np.char.add(lines, ' ')
+        lines = np.char.add(lines, time_col)
+        lines = np.char.add(lines, '      ')
+        lines = np.char.add(lines, vals)
+        lines = np.char.add(lines, '\n')
+        parts.append(''.join(lines.tolist()))
+    parts.append("\n")
+    return ''.join(parts)
 
 def format_inflows(ssa_ids):
-    inflow_str = "[INFLOWS]\n"
-    inflow_str += ";;                                                 Param    Units    Scale    Baseline Baseline\n"
-    inflow_str += ";;Node           Parameter        Time Series      Type     Factor   Factor   Value    Pattern\n"
-    inflow_str += ";;-------------- ---------------- ---------------- -------- -------- -------- -------- --------\n"
+    parts = [
+        "[INFLOWS]\n",
+        ";;                                                 Param    Units    Scale    Baseline Baseline\n",
+        ";;Node           Parameter        Time Series      Type     Factor   Factor   Value    Pattern\n",
+        ";;-------------- ---------------- ---------------- -------- -------- -------- -------- --------\n",
+    ]
     for ssa_id in ssa_ids:
-        inflow_str += f"{ssa_id:<17}FLOW             {ssa_id}_ts\n"
-    inflow_str += "\n"
-    return inflow_str
+        parts.append(f"{ssa_id:<17}FLOW             {ssa_id}_ts\n")
+    parts.append("\n")
+    return ''.join(parts)
 
 def replace_timeseries_in_inp(inp_file_path, df, ssa_ids):
     with open(inp_file_path, 'r', encoding='ISO-8859-1') as file:
         inp_content = file.readlines()
 
-    timeseries_found = False
-    inflows_found = False
-    
-    for i, line in enumerate(inp_content):
-        if line.strip().startswith("[TIMESERIES]"):
-            timeseries_found = True
-        elif line.strip().startswith("[INFLOWS]"):
-            inflows_found = True
-    
-    
-    in_section = False
-    start_1_index, end_1_index, start_2_index, end_2_index = None, None, None, None
+    # Single pass: record [start, end) line indices for every section header
+    sections = {}
+    open_name = None
     for i, line in enumerate(inp_content):
-        if line.strip().startswith("[INFLOWS]") or line.strip().startswith("[TIMESERIES]"):
-            if in_section:
-                end_1_index = i
-            if start_1_index is None:
-                start_1_index = i
-            else:
-                start_2_index = i
-            in_section = True
-        elif line.strip().startswith("[") and in_section:
-            if end_1_index is None:
-                end_1_index = i
-            else:
-                end_2_index = i
-            in_section = False
+        stripped = line.strip()
+        if stripped.startswith('['):
+            if open_name is not None:
+                sections[open_name][1] = i
+            open_name = stripped.split(']', 1)[0] + ']'
+            sections[open_name] = [i, len(inp_content)]
 
-    
     inflow_section = format_inflows(ssa_ids)
     timeseries_section = format_timeseries(df)
-    
-    if not timeseries_found or not inflows_found:
-        start_2_index = end_1_index
-        end_2_index = end_1_index
-    
-    if not timeseries_found and not inflows_found:
-        updated_content = inp_content + ["\n"] + [inflow_section] + [timeseries_section]
+
+    inflows_span = sections.get('[INFLOWS]')
+    timeseries_span = sections.get('[TIMESERIES]')
+
+    if inflows_span and timeseries_span:
+        first, second = sorted([inflows_span, timeseries_span])
+        updated_content = (inp_content[:first[0]] + [inflow_section]
+                           + inp_content[first[1]:second[0]] + [timeseries_section]
+                           + inp_content[second[1]:])
+    elif inflows_span or timeseries_span:
+        span = inflows_span or timeseries_span
+        updated_content = (inp_content[:span[0]] + [inflow_section, timeseries_section]
+                           + inp_content[span[1]:])
     else:
-        updated_content = inp_content[:start_1_index] + [inflow_section] + inp_content[end_1_index:start_2_index] + [timeseries_section] + inp_content[end_2_index:]
+        updated_content = inp_content + ["\n", inflow_section, timeseries_section]
 
     output_inp_file = os.path.splitext(inp_file_path)[0] + "_Updated.inp"
     with open(output_inp_file, 'w', encoding='ISO-8859-1') as file:
@@ -154,27 +158,32 @@ def create_shapefile(shp_input_filepath, inp_string, mapping_dict):
     
     gdf = gpd.read_file(shp_input_filepath)
     crs = gdf.crs
-    
-    line_data = {
-        'HMS ID': [],
-        'SSA Manhole-ID': [],
-        'geometry': []
-    }
-    
-    for index, mapping in mapping_dict.iterrows():
-        
-        shp_id = mapping['HMS Name']
-        coord_id = mapping['SSA Manhole-ID']
-        print(shp_id)
-        watershed = gdf[gdf['name'] == shp_id]
-        watershed_centroid = watershed.geometry.centroid
-        first_point = (watershed_centroid.iloc[0].x, watershed_centroid.iloc[0].y)
-        second_point = (coords_df[coords_df['Node'] == coord_id]['X-Coord'].iloc[0], coords_df[coords_df['Node'] == coord_id]['Y-Coord'].iloc[0])
-        line_data['HMS ID'].append(shp_id)
-        line_data['SSA Manhole-ID'].append(coord_id)
-        line_data['geometry'].append(LineString([first_point, second_point]))
-        
-    line_gdf = gpd.GeoDataFrame(line_data, crs=crs)
+
+    # Join the watershed centroids and INP node coordinates onto the mapping
+    # in one pass instead of a linear scan of each frame per mapping row
+    centroids = gdf.set_index('name').geometry.centroid
+    centroids = centroids[~centroids.index.duplicated()]
+    coord_lu = coords_df.set_index('Node')
+    coord_lu = coord_lu[~coord_lu.index.duplicated()]
+
+    merged = (mapping_dict[['HMS Name', 'SSA Manhole-ID']]
+              .join(centroids.rename('centroid'), on='HMS Name')
+              .join(coord_lu, on='SSA Manhole-ID')
+              .dropna(subset=['centroid', 'X-Coord', 'Y-Coord']))
+
+    # Build all line geometries in one GEOS call (shapely 2.0) rather than a
+    # scalar LineString per row
+    endpoints = np.empty((len(merged), 2, 2), dtype=float)
+    endpoints[:, 0, 0] = shapely.get_x(merged['centroid'].values)
+    endpoints[:, 0, 1] = shapely.get_y(merged['centroid'].values)
+    endpoints[:, 1, 0] = merged['X-Coord'].values
+    endpoints[:, 1, 1] = merged['Y-Coord'].values
+
+    line_gdf = gpd.GeoDataFrame({
+        'HMS ID': merged['HMS Name'].values,
+        'SSA Manhole-ID': merged['SSA Manhole-ID'].values,
+        'geometry': shapely.linestrings(endpoints)
+    }, crs=crs)
     shp_out_path = filedialog.asksaveasfilename(defaultextension=".shp", filetypes=[("Shapefile", "*.shp")])
     line_gdf.to_file(shp_out_path, driver='ESRI Shapefile')
     print('Shapefile Created')
@@ -234,41 +243,68 @@ def start_conversion():
         print("Model input required. Exiting.")
         return
     
-    # Create a list to store individual dataframes
-    df_list = []
+    # Collect the pathnames to read first, then read them in parallel and
+    # aggregate with a single groupby instead of one outer-join concat per
+    # SSA ID
+    read_tasks = []
     missed_mapping = []
-    
+
     unique_ssa_ids = mapping['SSA Manhole-ID'].unique()
-    
+
     for ssa_id in unique_ssa_ids:
         hms_ids = mapping[mapping['SSA Manhole-ID'] == ssa_id]['HMS Name']
-        
-        composite_list = []
-        
+
+        found_ts = False
+
         for hms_id in hms_ids:
             # Filter pathnames for the specific HMS ID and model with /FLOW/
             pathnames = [s for s in pathname_list if f'/{hms_id}/' in s and '/FLOW/' in s and model in s]
-            
+
             for pathname in pathnames:
-                ts = fid.read_ts(pathname)
-                times = np.array(ts.pytimes)
-                values = ts.values
-                valid_times = times[~ts.nodata]
-                valid_values = values[~ts.nodata]
-                df = pd.DataFrame({'Time': pd.to_datetime(valid_times), hms_id: valid_values})
-                df.set_index('Time', inplace=True)
-                composite_list.append(df)
-        
-        if len(composite_list) > 0:
-            composite_df = pd.concat(composite_list, axis=1, join='outer')
-            summed_df = composite_df.sum(axis=1).to_frame(name=f'{ssa_id}_ts')
-            df_list.append(summed_df)
-        else:
+                read_tasks.append((pathname, f'{ssa_id}_ts'))
+                found_ts = True
+
+        if not found_ts:
             missed_mapping.append(ssa_id)
-    
-    combined_df = pd.concat(df_list, axis=1, join='outer')
-    combined_df.index = pd.to_datetime(combined_df.index)
+
     fid.close()
+
+    # The native HEC-DSS read releases the GIL, so a thread pool scales the
+    # reads. Handles are not thread-safe to share, so each worker thread
+    # lazily opens its own.
+    thread_local = threading.local()
+    worker_handles = []
+    handles_lock = threading.Lock()
+
+    def read_one(task):
+        pathname, ssa_label = task
+        worker_fid = getattr(thread_local, 'fid', None)
+        if worker_fid is None:
+            worker_fid = HecDss.Open(dss_file)
+            thread_local.fid = worker_fid
+            with handles_lock:
+                worker_handles.append(worker_fid)
+        ts = worker_fid.read_ts(pathname)
+        # Convert straight to datetime64 and mask once; an object array of
+        # Python datetimes would be reparsed by pd.to_datetime later
+        valid = ~ts.nodata
+        valid_times = np.asarray(ts.pytimes, dtype='datetime64[s]')[valid]
+        valid_values = np.asarray(ts.values)[valid]
+        return valid_times, np.full(len(valid_times), ssa_label, dtype=object), valid_values
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(16, os.cpu_count() or 1)) as executor:
+            results = list(executor.map(read_one, read_tasks))
+    finally:
+        for handle in worker_handles:
+            handle.close()
+
+    long_df = pd.DataFrame({
+        'Time': pd.to_datetime(np.concatenate([r[0] for r in results])),
+        'SSA': np.concatenate([r[1] for r in results]),
+        'Value': np.concatenate([r[2] for r in results])
+    })
+    combined_df = long_df.groupby(['Time', 'SSA'])['Value'].sum().unstack('SSA')
     
     #combined_df.plot()
     # Replace timeseries in INP file
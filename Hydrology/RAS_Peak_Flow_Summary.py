@@ -17,6 +17,18 @@ import pandas as pd
 import plotly.graph_objects as go
 
 
+_NUM_RE = re.compile(r'-?\d*\.\d+|-?\d+')
+
+# Plan-file key -> output column for the simple one-line fields
+_FIELD_KEYS = {
+    'Use DSS': 'Use DSS',
+    'DSS File': 'DSS Filepath',
+    'DSS Path': 'Timeseries Path',
+    'Interval': 'Interval',
+    'Flow Hydrograph QMin': 'Q Min',
+}
+
+
 def plot_interactive_line(df, output_file):
 
     if not isinstance(df.index, pd.DatetimeIndex):
@@ -25,9 +37,11 @@ def plot_interactive_line(df, output_file):
     # Create a Plotly figure
     fig = go.Figure()
 
-    # Add a line trace for each column
+    # Add a WebGL line trace for each column; SVG Scatter bogs down the
+    # browser once the page holds more than a few tens of thousands of points
+    x_values = df.index.values
     for col in df.columns:
-        fig.add_trace(go.Scatter(x=df.index, y=df[col], mode='lines', name=col))
+        fig.add_trace(go.Scattergl(x=x_values, y=df[col].values, mode='lines', name=col))
 
     # Update layout for better visualization
     fig.update_layout(
@@ -94,130 +108,143 @@ def summarize_flows():
     
     outflows = prompt_yes_no("Include Outflows", "Do you want to include negative flow values?")
 
-    # Initialize the DataFrame
+    # Accumulate parsed rows in a list; growing a DataFrame with pd.concat
+    # copies the whole frame on every append
     columns = ['ID', 'Use DSS', 'DSS Filepath', 'Timeseries Path', 'Q Min', 'Hydrograph', 'Interval']
-    df = pd.DataFrame(columns=columns)
+    rows = []
 
     groups = split_into_groups(file_path)
-    
+
     for group in groups:
-        
-        boundary_id = None
-        use_dss = None
-        dss_filepath = None
-        dss_path = None
-        q_min = None
-        interval = None
+
+        fields = {
+            'ID': None,
+            'Use DSS': None,
+            'DSS Filepath': None,
+            'Timeseries Path': None,
+            'Q Min': None,
+            'Interval': None,
+        }
         hydrograph = ""
         in_hydrograph = False
-        
+
         for line in group:
+            # Split each line once instead of running a startswith cascade
+            key, sep, val = line.partition('=')
+
             if in_hydrograph:
-                if "=" in line:
+                if sep:
                     in_hydrograph = False
                 else:
                     hydrograph += line
-            
-            if line.startswith("Boundary Location="):
-                after_equal = line.split("=", 1)[1]
-                boundary_id = " ".join(after_equal.replace(",", "").split())
-            elif line.startswith("Use DSS="):
-                use_dss = line.split("=", 1)[1]
-            elif line.startswith("DSS File="):
-                dss_filepath = line.split("=", 1)[1]
-            elif line.startswith("DSS Path="):
-                dss_path = line.split("=", 1)[1]
-            elif line.startswith("Interval="):
-                interval = line.split("=", 1)[1]
-            elif line.startswith("Flow Hydrograph QMin="):
-                q_min = line.split("=", 1)[1]
-            elif line.startswith("Lateral Inflow Hydrograph="):
+                    continue
+
+            if not sep:
+                continue
+
+            if key == "Boundary Location":
+                fields['ID'] = " ".join(val.replace(",", "").split())
+            elif key == "Lateral Inflow Hydrograph":
                 in_hydrograph = True
+            else:
+                field = _FIELD_KEYS.get(key)
+                if field is not None:
+                    fields[field] = val
 
-        new_row = {
-            'ID': boundary_id,
-            'Use DSS': use_dss,
-            'DSS Filepath': dss_filepath,
-            'Timeseries Path': dss_path,
-            'Q Min': q_min,
-            'Hydrograph': list(map(float, re.findall(r'-?\d*\.\d+|-?\d+', hydrograph))),
-            'Interval': interval
-        }
+        new_row = dict(fields)
+        new_row['Hydrograph'] = list(map(float, _NUM_RE.findall(hydrograph)))
+
+        rows.append(new_row)
 
-        # Use pd.concat to add the new row to the DataFrame
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+    df = pd.DataFrame(rows, columns=columns)
 
     unique_ids = df['ID'].unique()
-    
+
     df_list = []
-    no_dss_df = pd.DataFrame(columns=['ID', 'Q Min', 'Hydrograph', 'Interval'])
-    
-    for unique_id in unique_ids:
-        unique_df = df[df['ID'] == unique_id]
-        
-        composite_list = []
-        
-        for index, row in unique_df.iterrows():
-            dss_file = row['DSS Filepath']
-            pathname = row['Timeseries Path']
-            
-            if dss_file and pathname:
-                path_parts = pathname.split('/')
-                path_parts[4] = ''#path_parts[4].split('-')[0]
-                pathname = '/'.join(path_parts)
-                
-                full_dss_path = os.path.abspath(os.path.join(os.path.dirname(file_path), dss_file))
-
-                if os.path.exists(full_dss_path):
-                    try:
-                        fid = HecDss.Open(full_dss_path)
-                        ts = fid.read_ts(pathname)
-                        fid.close()
-                        path_log += f'{full_dss_path}: {pathname}: '
-                        if ts is None or ts.pytimes is None or ts.values is None:
-                            error_log += f'Time series data is None for {pathname} in {full_dss_path}\n'
-                            path_log += 'NO\n'
-                        else:
-                            path_log += 'YES\n'
-                            times = np.array(ts.pytimes)
-                            values = ts.values
-                            
-                            # Check for empty arrays
-                            if len(times) == 0 or len(values) == 0:
-                                error_log += f'Time series data is empty for pathname: {pathname}\n'
+    no_dss_rows = []
+
+    # Keep DSS files open across rows; re-opening per pathname re-parses the
+    # file catalog every time
+    open_files = {}
+
+    try:
+        for unique_id in unique_ids:
+            unique_df = df[df['ID'] == unique_id]
+
+            composite_list = []
+
+            for index, row in unique_df.iterrows():
+                dss_file = row['DSS Filepath']
+                pathname = row['Timeseries Path']
+
+                if dss_file and pathname:
+                    path_parts = pathname.split('/')
+                    path_parts[4] = ''#path_parts[4].split('-')[0]
+                    pathname = '/'.join(path_parts)
+
+                    full_dss_path = os.path.abspath(os.path.join(os.path.dirname(file_path), dss_file))
+
+                    if os.path.exists(full_dss_path):
+                        try:
+                            fid = open_files.get(full_dss_path)
+                            if fid is None:
+                                fid = open_files.setdefault(full_dss_path, HecDss.Open(full_dss_path))
+                            ts = fid.read_ts(pathname)
+                            path_log += f'{full_dss_path}: {pathname}: '
+                            if ts is None or ts.pytimes is None or ts.values is None:
+                                error_log += f'Time series data is None for {pathname} in {full_dss_path}\n'
+                                path_log += 'NO\n'
                             else:
-                                valid_times = times[~ts.nodata]
-                                valid_values = values[~ts.nodata]
-                                
-                                ts_df = pd.DataFrame({'Time': pd.to_datetime(valid_times), unique_id: valid_values})
-                                ts_df.set_index('Time', inplace=True)
-                                #print(f'{unique_id}: {valid_values.max()}')
-                                composite_list.append(ts_df)
-                                #ts_df.plot()
-                    except Exception as e:
-                        error_log += f'Error processing DSS file {full_dss_path} with pathname {pathname}: {e}\n'
-            else:
-                no_dss_row = {
-                    'ID': unique_id,
-                    'Q Min': row['Q Min'],
-                    'Hydrograph': row['Hydrograph'],
-                    'Interval': row['Interval']
-                }
-                no_dss_df = pd.concat([no_dss_df, pd.DataFrame([no_dss_row])], ignore_index=True)
-
-        if len(composite_list) > 0:
-            composite_df = pd.concat(composite_list, axis=1, join='outer').astype('float')
-            
-            if not outflows:
-                composite_df = composite_df.clip(lower=0)
-                
-            summed_df = composite_df.sum(axis=1).to_frame(name=f'{unique_id}')
-            df_list.append(summed_df)
-    
-    
+                                path_log += 'YES\n'
+                                # Convert straight to datetime64 and mask once;
+                                # an object array of Python datetimes would be
+                                # reparsed by pd.to_datetime
+                                times = np.asarray(ts.pytimes, dtype='datetime64[s]')
+                                values = np.asarray(ts.values)
+
+                                # Check for empty arrays
+                                if len(times) == 0 or len(values) == 0:
+                                    error_log += f'Time series data is empty for pathname: {pathname}\n'
+                                else:
+                                    valid = ~ts.nodata
+                                    ts_df = pd.DataFrame(
+                                        {unique_id: values[valid]},
+                                        index=pd.DatetimeIndex(times[valid], name='Time')
+                                    )
+                                    #print(f'{unique_id}: {valid_values.max()}')
+                                    composite_list.append(ts_df)
+                                    #ts_df.plot()
+                        except Exception as e:
+                            error_log += f'Error processing DSS file {full_dss_path} with pathname {pathname}: {e}\n'
+                else:
+                    no_dss_row = {
+                        'ID': unique_id,
+                        'Q Min': row['Q Min'],
+                        'Hydrograph': row['Hydrograph'],
+                        'Interval': row['Interval']
+                    }
+                    no_dss_rows.append(no_dss_row)
+
+            if len(composite_list) > 0:
+                composite_df = pd.concat(composite_list, axis=1, join='outer').astype('float')
+
+                if not outflows:
+                    composite_df = composite_df.clip(lower=0)
+
+                summed_df = composite_df.sum(axis=1).to_frame(name=f'{unique_id}')
+                df_list.append(summed_df)
+    finally:
+        for fid in open_files.values():
+            try:
+                fid.close()
+            except Exception:
+                pass
+
+    no_dss_df = pd.DataFrame(no_dss_rows, columns=['ID', 'Q Min', 'Hydrograph', 'Interval'])
+
     combined_df = pd.concat(df_list, axis=1, join='outer')
     combined_df.index = pd.to_datetime(combined_df.index)
-    
+
     for index, row in no_dss_df.iterrows():
         if (row['Q Min'] is not None) or (len(row['Hydrograph']) > 0):
             if row['Q Min'] is not None:
@@ -1,4 +1,6 @@
+import asyncio
 import geopandas as gpd
+import io
 import os
 import re
 import json
@@ -9,24 +11,59 @@ import tempfile
 import threading
 import time
 import logging
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from glob import glob
 from urllib.parse import urljoin
 import requests
-from flask import Flask, request, render_template, jsonify, send_file, abort
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import Flask, request, render_template, jsonify, send_file, abort, Response
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
 from werkzeug.middleware.proxy_fix import ProxyFix
 import rasterio
 from rasterio.merge import merge as rio_merge
-from rasterio.mask import mask as rio_mask
+from rasterio.features import geometry_mask
 from rasterio.warp import calculate_default_transform, reproject, Resampling, transform_geom
+from rasterio.windows import Window, from_bounds as windows_from_bounds
 from rasterio.io import MemoryFile
+import shapely
 from shapely.geometry import shape, mapping
-from shapely.ops import unary_union
-from pyproj import CRS
+from pyproj import CRS, Transformer
 import numpy as np
 
+# Optional pyogrio support; it reads shapefiles through a vectorized C path
+# instead of Fiona's per-feature Python iteration
+try:
+    import pyogrio  # noqa: F401
+    GPD_ENGINE = "pyogrio"
+    gpd.options.io_engine = "pyogrio"
+except Exception:
+    GPD_ENGINE = None
+
+# Optional orjson support; its C encoder is several times faster than stdlib
+# json for large payloads and serializes numpy scalars natively
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    ORJSON_AVAILABLE = False
+
+
+def json_dumps(obj) -> str:
+    """Serialize with orjson when installed, stdlib json otherwise."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj)
+
+
+def json_loads(data):
+    """Parse with orjson when installed, stdlib json otherwise."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # --- Configure logging ---
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
@@ -56,6 +93,31 @@ TILE_INDEX_MAPSERVER = "https://services1.arcgis.com/99lidPhWCzftIe9K/arcgis/res
 BASE_WORK_DIR = os.environ.get("LIDAR_WORKDIR", tempfile.gettempdir())
 os.makedirs(BASE_WORK_DIR, exist_ok=True)
 MAX_WORKER_THREADS = int(os.environ.get("MAX_WORKER_THREADS", "2"))
+MAX_TILE_THREADS = int(os.environ.get("LIDAR_TILE_THREADS", "8"))
+# Tile zips at or above this size are fetched as parallel byte-range segments
+RANGE_MIN_BYTES = int(os.environ.get("LIDAR_RANGE_MIN_BYTES", str(32 * 1024 * 1024)))
+RANGE_SEGMENTS = int(os.environ.get("LIDAR_RANGE_SEGMENTS", "4"))
+# Tile zips up to this size are buffered in RAM and extracted without ever
+# writing the zip itself to disk (keep modest: MAX_TILE_THREADS buffers can
+# be live at once)
+ZIP_MEM_MAX_BYTES = int(os.environ.get("LIDAR_ZIP_MEM_BYTES", str(128 * 1024 * 1024)))
+
+# One pooled HTTP session for all ArcGIS/tile traffic. Bare requests.get
+# re-does TCP+TLS setup per call; keepalive connections are shared across the
+# tile/dataset worker threads, with retries on transient gateway errors.
+_SESSION = requests.Session()
+_http_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+)
+_SESSION.mount("https://", _http_adapter)
+_SESSION.mount("http://", _http_adapter)
+
+# Uploaded shapefile parts are ephemeral; keep them on tmpfs when available so
+# the four saves and the follow-up read never touch disk. Override with
+# SHP_TMPDIR; None falls back to the platform default temp dir.
+SHP_TMPDIR = os.environ.get("SHP_TMPDIR") or ("/dev/shm" if os.path.isdir("/dev/shm") else None)
 
 # ----------------------------
 # JOB SYSTEM
@@ -70,12 +132,24 @@ class JobCancelled(Exception):
 def now_epoch():
     return int(time.time())
 
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_\-]+")
+
+@lru_cache(maxsize=1024)
 def safe_name(text: str) -> str:
-    """Filesystem-safe name."""
+    """Filesystem-safe name. Pure function of its input, so cached: the same
+    dataset names recur across a job's tile and output paths."""
     text = str(text or "").strip()
-    text = re.sub(r"[^A-Za-z0-9_\-]+", "_", text)
+    text = _SAFE_NAME_RE.sub("_", text)
     return text[:120] or "dataset"
 
+_WGS84 = CRS.from_epsg(4326)
+
+@lru_cache(maxsize=128)
+def _crs_from_user_input(value: str) -> CRS:
+    """CRS construction invokes PROJ string/WKT parsing; requests repeat the
+    same handful of CRSs, so cache the parsed objects."""
+    return CRS.from_user_input(value)
+
 def _choose_output_nodata(dtype, preferred=-9999.0):
     """
     Choose a nodata value that is representable for dtype.
@@ -107,24 +181,102 @@ def remove_all_files(folderpath: str) -> None:
             if os.path.isfile(f):
                 os.remove(f)
 
+def _download_ranged(url: str, zip_path: str, total: int, cancel_event: threading.Event = None) -> None:
+    """
+    Fetch url as RANGE_SEGMENTS concurrent byte-range streams, each written
+    at its own offset into a preallocated file. Caller has already verified
+    the server advertises Accept-Ranges: bytes.
+    """
+    with open(zip_path, "wb") as f:
+        f.truncate(total)
+
+    seg = -(-total // RANGE_SEGMENTS)
+
+    def fetch_segment(lo: int, hi: int):
+        headers = {"Range": f"bytes={lo}-{hi}"}
+        with _SESSION.get(url, headers=headers, stream=True, timeout=120) as r:
+            if r.status_code != 206:
+                raise RuntimeError(f"Server ignored Range request (HTTP {r.status_code}).")
+            with open(zip_path, "r+b") as f:
+                f.seek(lo)
+                for chunk in r.iter_content(chunk_size=1024 * 1024):
+                    if cancel_event and cancel_event.is_set():
+                        raise JobCancelled("Job canceled during download.")
+                    if chunk:
+                        f.write(chunk)
+
+    ranges = [(lo, min(lo + seg, total) - 1) for lo in range(0, total, seg)]
+    with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [pool.submit(fetch_segment, lo, hi) for lo, hi in ranges]
+        for fut in as_completed(futures):
+            fut.result()
+
 def download_and_extract_zip(url: str, save_folder: str, cancel_event: threading.Event = None) -> None:
     """
     Download a zip from url -> save_folder, extract contents, remove zip.
+    Large zips on range-capable servers are fetched as parallel byte-range
+    segments; a single high-latency stream underutilizes the link.
     Cancellation-aware: checks cancel_event while downloading.
     """
     os.makedirs(save_folder, exist_ok=True)
     file_name = os.path.basename(url)
     zip_path = os.path.join(save_folder, file_name)
 
+    # Probe size and range support once up front
+    total = 0
+    accepts_ranges = False
     try:
-        with requests.get(url, stream=True, timeout=120) as r:
+        head = _SESSION.head(url, timeout=30, allow_redirects=True)
+        if head.ok:
+            total = int(head.headers.get("Content-Length") or 0)
+            accepts_ranges = head.headers.get("Accept-Ranges", "").lower() == "bytes"
+    except Exception:
+        pass
+
+    # Small zips: buffer in RAM and extract directly, skipping the
+    # write-zip-to-disk / read-it-back round trip entirely
+    if 0 < total <= ZIP_MEM_MAX_BYTES:
+        buf = io.BytesIO()
+        with _SESSION.get(url, stream=True, timeout=120) as r:
             r.raise_for_status()
-            with open(zip_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=1024 * 1024):
-                    if cancel_event and cancel_event.is_set():
-                        raise JobCancelled("Job canceled during download.")
-                    if chunk:
-                        f.write(chunk)
+            for chunk in r.iter_content(chunk_size=1024 * 1024):
+                if cancel_event and cancel_event.is_set():
+                    raise JobCancelled("Job canceled during download.")
+                if chunk:
+                    buf.write(chunk)
+        if cancel_event and cancel_event.is_set():
+            raise JobCancelled("Job canceled before extraction.")
+        with zipfile.ZipFile(buf) as z:
+            z.extractall(save_folder)
+        return
+
+    try:
+        downloaded = False
+        if accepts_ranges and total >= RANGE_MIN_BYTES:
+            try:
+                _download_ranged(url, zip_path, total, cancel_event)
+                downloaded = True
+            except JobCancelled:
+                raise
+            except Exception:
+                # Any ranged-path hiccup falls back to the single stream below
+                downloaded = False
+
+        if not downloaded:
+            with _SESSION.get(url, stream=True, timeout=120) as r:
+                r.raise_for_status()
+                r.raw.decode_content = True
+                with open(zip_path, "wb") as f:
+                    if cancel_event:
+                        # Chunked loop so cancellation is noticed mid-download
+                        for chunk in r.iter_content(chunk_size=1024 * 1024):
+                            if cancel_event.is_set():
+                                raise JobCancelled("Job canceled during download.")
+                            if chunk:
+                                f.write(chunk)
+                    else:
+                        # Tight C-level copy, no per-chunk Python iteration
+                        shutil.copyfileobj(r.raw, f, length=1024 * 1024)
 
         if cancel_event and cancel_event.is_set():
             raise JobCancelled("Job canceled before extraction.")
@@ -139,9 +291,12 @@ def download_and_extract_zip(url: str, save_folder: str, cancel_event: threading
             except Exception:
                 pass
 
+@lru_cache(maxsize=32)
 def get_layer_id(mapserv_url: str, layer_name: str) -> int | None:
+    """Resolve a layer name to its id. Cached: every dataset in a job (and
+    every job against the same service) asks for the same metadata JSON."""
     meta_url = f"{mapserv_url}?f=json"
-    resp = requests.get(meta_url, timeout=60)
+    resp = _SESSION.get(meta_url, timeout=60)
     if resp.status_code != 200:
         return None
     data = resp.json()
@@ -155,7 +310,7 @@ def parse_geojson_geometry(uploaded_geojson) -> tuple[list[dict], CRS]:
     Convert GeoJSON to (list_of_geojson_geom_dicts, input_crs).
     Defaults to EPSG:4326 when CRS not present.
     """
-    input_crs = CRS.from_epsg(4326)
+    input_crs = _WGS84
 
     if isinstance(uploaded_geojson, dict):
         crs_obj = uploaded_geojson.get("crs")
@@ -163,7 +318,7 @@ def parse_geojson_geometry(uploaded_geojson) -> tuple[list[dict], CRS]:
             try:
                 name = crs_obj.get("properties", {}).get("name")
                 if name:
-                    input_crs = CRS.from_user_input(name)
+                    input_crs = _crs_from_user_input(name)
             except Exception:
                 pass
 
@@ -188,37 +343,53 @@ def parse_geojson_geometry(uploaded_geojson) -> tuple[list[dict], CRS]:
     if not geoms:
         raise ValueError("No polygon geometry found in uploaded GeoJSON.")
 
+    # Keep the geometries as a list; everything downstream (bbox queries,
+    # geometry_mask) accepts multiple geoms, so unioning them was an O(N log N)
+    # GEOS pass for nothing. Only repair the ones that need it.
     shapely_geoms = [shape(g) for g in geoms]
-    unioned = unary_union(shapely_geoms)
-    if unioned.is_empty:
+    shapely_geoms = [g if g.is_valid else shapely.make_valid(g) for g in shapely_geoms]
+    shapely_geoms = [g for g in shapely_geoms if not g.is_empty]
+    if not shapely_geoms:
         raise ValueError("Uploaded GeoJSON geometry is empty.")
 
-    return [mapping(unioned)], input_crs
+    return [mapping(g) for g in shapely_geoms], input_crs
 
 def get_bbox_from_geom(geom_geojson_list: list[dict]) -> dict:
-    geom = shape(geom_geojson_list[0])
-    minx, miny, maxx, maxy = geom.bounds
-    return {"xmin": minx, "ymin": miny, "xmax": maxx, "ymax": maxy}
+    bounds = np.array([shape(g).bounds for g in geom_geojson_list])
+    minx, miny = bounds[:, :2].min(axis=0)
+    maxx, maxy = bounds[:, 2:].max(axis=0)
+    return {"xmin": float(minx), "ymin": float(miny), "xmax": float(maxx), "ymax": float(maxy)}
 
 def get_dataset_ext(datasets: list[str], url: str) -> dict:
     query_url = f"{url}/query"
-    where = " OR ".join([f"Tile_Index = '{d}'" for d in datasets])
+    # One IN-list is faster server-side than a chain of ORs, and POSTing the
+    # query sidesteps URL-length limits for long dataset lists
+    in_list = ",".join("'" + d.replace("'", "''") + "'" for d in datasets)
     params = {
         "outFields": "Tile_Index,File_Extension",
         "returnGeometry": "false",
         "f": "json",
-        "where": where
-    }
-    resp = requests.get(query_url, params=params, timeout=60)
-    resp.raise_for_status()
-    data = resp.json()
-    features = data.get("features", [])
-    return {
-        f["attributes"]["Tile_Index"]: f["attributes"]["File_Extension"]
-        for f in features
-        if f.get("attributes")
+        "where": f"Tile_Index IN ({in_list})",
+        "resultRecordCount": 2000,
+        "resultOffset": 0,
     }
 
+    ext_map = {}
+    while True:
+        resp = _SESSION.post(query_url, data=params, timeout=60)
+        resp.raise_for_status()
+        data = json_loads(resp.content)
+        features = data.get("features", [])
+        for f in features:
+            if f.get("attributes"):
+                ext_map[f["attributes"]["Tile_Index"]] = f["attributes"]["File_Extension"]
+        # Page through when the service truncates the result set; also stop
+        # on an empty page so a stale exceededTransferLimit can't loop forever
+        if not data.get("exceededTransferLimit") or not features:
+            break
+        params["resultOffset"] += len(features)
+    return ext_map
+
 def get_intersecting_tiles(
     geom_geojson_list: list[dict],
     tile_index_url: str,
@@ -248,7 +419,7 @@ def get_intersecting_tiles(
     params = {
         "f": "json",
         "where": f"TILE_INDEX = '{layer_id}'",
-        "geometry": json.dumps(bbox),
+        "geometry": json_dumps(bbox),
         "geometryType": "esriGeometryEnvelope",
         "spatialRel": "esriSpatialRelIntersects",
         "outFields": "PATH,TILE,EXT",
@@ -256,10 +427,10 @@ def get_intersecting_tiles(
         "inSR": in_wkid
     }
 
-    resp = requests.get(query_url, params=params, timeout=60)
+    resp = _SESSION.get(query_url, params=params, timeout=60)
     if resp.status_code != 200:
         return []
-    data = resp.json()
+    data = json_loads(resp.content)
 
     tiles = []
     for feat in data.get("features", []):
@@ -274,6 +445,8 @@ def mosaic_rasters_to_array(
     negative_to_nodata: bool = True,
     reproject_to_first: bool = True,
     resampling: Resampling = Resampling.bilinear,
+    mask_geoms: list[dict] | None = None,
+    mask_crs=None,
 ):
     """
     Robust mosaic that:
@@ -281,6 +454,8 @@ def mosaic_rasters_to_array(
       - sets any values < 0 to nodata BEFORE mosaicing (optional)
       - optionally reprojects inputs to match the first raster CRS
       - avoids rasterio.merge warnings about unsafe nodata values by pre-filling
+      - when mask_geoms is given, limits the merged extent to the mask bounds
+        so the output covers the AOI envelope rather than the tile union
     Returns: mosaic_array, transform, crs, meta
     """
 
@@ -366,8 +541,33 @@ def mosaic_rasters_to_array(
             # Re-open for merge consumption
             std_datasets.append(mf.open())
 
-        # Perform merge using standardized datasets
-        mosaic, transform = rio_merge(std_datasets, nodata=out_nodata)
+        # Limit the merge to the mask envelope when one is supplied; merging
+        # the full tile union only to crop it afterwards allocates (and fills)
+        # a far larger array than the AOI needs
+        merge_bounds = None
+        if mask_geoms:
+            geoms = mask_geoms
+            if mask_crs is not None:
+                src_crs_str = mask_crs.to_string() if hasattr(mask_crs, "to_string") else str(mask_crs)
+                dst_crs_str = ref_crs.to_string()
+                if src_crs_str != dst_crs_str:
+                    geoms = [
+                        transform_geom(src_crs_str, dst_crs_str, g, precision=6)
+                        for g in mask_geoms
+                    ]
+            geom_bounds = [shape(g).bounds for g in geoms]
+            merge_bounds = (
+                min(b[0] for b in geom_bounds),
+                min(b[1] for b in geom_bounds),
+                max(b[2] for b in geom_bounds),
+                max(b[3] for b in geom_bounds),
+            )
+
+        # Perform merge using standardized datasets; mem_limit keeps merge on
+        # its chunked copy path instead of one monolithic allocation
+        mosaic, transform = rio_merge(
+            std_datasets, nodata=out_nodata, bounds=merge_bounds, mem_limit=64
+        )
 
         # Build output meta
         meta_out = ref.meta.copy()
@@ -409,63 +609,124 @@ def mosaic_rasters_to_array(
                 pass
 
 
-def clip_array_with_geojson(mosaic_array, mosaic_transform, mosaic_meta, mosaic_crs, mask_geoms, mask_crs):
+def mosaic_rasters_to_file(raster_paths: list[str], out_path: str, nodata=-9999.0, bounds=None) -> str:
     """
-    Clip mosaic by polygon mask using rasterio.mask.
-    Ensures mask_geoms are in the same CRS as the raster.
-    mask_crs: pyproj.CRS or rasterio CRS or EPSG string that describes mask_geoms CRS
+    Merge already-standardized rasters straight to a GeoTIFF on disk.
+    With dst_path set, rio_merge streams windows to the output under
+    mem_limit instead of returning the full mosaic array, so peak memory
+    stays flat no matter how many inputs there are. Inputs must share
+    CRS/dtype/nodata — true for the per-dataset outputs this app writes.
     """
-    # Normalize CRS to something rasterio understands
-    if mosaic_crs is None:
-        raise ValueError("Raster CRS is None. Cannot clip without a defined raster CRS.")
-
-    # Convert mask_crs to a string for transform_geom
-    if isinstance(mask_crs, CRS):
-        src_crs_str = mask_crs.to_string()
-    else:
-        # allow already-string / rasterio CRS
-        src_crs_str = str(mask_crs)
+    srcs = [rasterio.open(p) for p in raster_paths]
+    try:
+        rio_merge(
+            srcs,
+            bounds=bounds,
+            nodata=nodata,
+            mem_limit=256,
+            dst_path=out_path,
+            dst_kwds={
+                "driver": "GTiff",
+                "compress": "DEFLATE",
+                "predictor": 3,
+                "tiled": True,
+                "blockxsize": 512,
+                "blockysize": 512,
+                "BIGTIFF": "IF_SAFER",
+            },
+        )
+    finally:
+        for s in srcs:
+            try:
+                s.close()
+            except Exception:
+                pass
 
-    dst_crs_str = mosaic_crs.to_string() if hasattr(mosaic_crs, "to_string") else str(mosaic_crs)
+    # The stitched file is the only raster delivered when stitching, so give
+    # it the same overview pyramid the per-dataset outputs get
+    with rasterio.open(out_path, "r+") as dst:
+        dst.build_overviews([2, 4, 8, 16], Resampling.average)
+        dst.update_tags(ns="rio_overview", resampling="average")
+    return out_path
 
-    # Reproject mask geometries ONLY if needed
-    if src_crs_str != dst_crs_str:
-        mask_geoms_proj = [
-            transform_geom(src_crs_str, dst_crs_str, g, precision=6)
-            for g in mask_geoms
-        ]
-    else:
-        mask_geoms_proj = mask_geoms
 
-    mem_meta = mosaic_meta.copy()
-    mem_meta.update({"driver": "GTiff", "crs": mosaic_crs})
+def clip_raster_with_geojson(raster_path: str, mask_geoms, mask_crs):
+    """
+    Clip an on-disk raster by polygon mask with a windowed read.
+    Only the window covering the mask bounds is ever read into memory, so the
+    full raster never has to sit in RAM alongside the clipped result.
+    mask_crs: pyproj.CRS or rasterio CRS or EPSG string that describes mask_geoms CRS
+    """
+    with rasterio.open(raster_path) as src:
+        if src.crs is None:
+            raise ValueError("Raster CRS is None. Cannot clip without a defined raster CRS.")
 
-    with MemoryFile() as memfile:
-        with memfile.open(**mem_meta) as ds:
-            ds.write(mosaic_array)
+        # Convert mask_crs to a string for transform_geom
+        if isinstance(mask_crs, CRS):
+            src_crs_str = mask_crs.to_string()
+        else:
+            # allow already-string / rasterio CRS
+            src_crs_str = str(mask_crs)
 
-            # Helpful debug if it still fails
-            # print("DEBUG ds.crs:", ds.crs, "bounds:", ds.bounds)
+        dst_crs_str = src.crs.to_string()
 
-            out_img, out_transform = rio_mask(
-                ds,
-                mask_geoms_proj,
-                crop=True,
-                nodata=ds.nodata
-            )
+        # Reproject mask geometries ONLY if needed
+        if src_crs_str != dst_crs_str:
+            mask_geoms_proj = [
+                transform_geom(src_crs_str, dst_crs_str, g, precision=6)
+                for g in mask_geoms
+            ]
+        else:
+            mask_geoms_proj = mask_geoms
+
+        nodata = src.nodata
+
+        # Window covering the mask bounds, clamped to the raster
+        geom_bounds = [shape(g).bounds for g in mask_geoms_proj]
+        minx = min(b[0] for b in geom_bounds)
+        miny = min(b[1] for b in geom_bounds)
+        maxx = max(b[2] for b in geom_bounds)
+        maxy = max(b[3] for b in geom_bounds)
+
+        window = windows_from_bounds(minx, miny, maxx, maxy, transform=src.transform)
+        row_start = max(int(np.floor(window.row_off)), 0)
+        col_start = max(int(np.floor(window.col_off)), 0)
+        row_stop = min(int(np.ceil(window.row_off + window.height)), src.height)
+        col_stop = min(int(np.ceil(window.col_off + window.width)), src.width)
+        if row_stop <= row_start or col_stop <= col_start:
+            raise ValueError("Mask geometry does not overlap the raster.")
+
+        read_window = Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
+        out_img = src.read(window=read_window)
+        out_transform = src.window_transform(read_window)
+
+        # Burn the polygon mask directly onto the windowed array
+        outside = geometry_mask(
+            mask_geoms_proj,
+            out_shape=(out_img.shape[1], out_img.shape[2]),
+            transform=out_transform
+        )
+        out_img[:, outside] = nodata if nodata is not None else 0
 
-            out_meta = ds.meta.copy()
-            out_meta.update({
-                "height": out_img.shape[1],
-                "width": out_img.shape[2],
-                "transform": out_transform
-            })
-            return out_img, out_transform, out_meta
+        out_meta = src.meta.copy()
+        out_meta.update({
+            "driver": "GTiff",
+            "height": out_img.shape[1],
+            "width": out_img.shape[2],
+            "transform": out_transform
+        })
+    return out_img, out_transform, out_meta
 
 
-def reproject_to_crs(src_array, src_meta, dst_crs_str: str, resampling=Resampling.bilinear):
+def reproject_to_geotiff(src_array, src_meta, dst_crs_str: str, out_path: str, resampling=Resampling.bilinear):
+    """
+    Reproject src_array and stream the result straight to a GeoTIFF on disk.
+    Warping into rasterio.band(dst, ...) lets GDAL flush blocks as they are
+    produced, so the destination array never materializes in memory.
+    Returns the destination meta.
+    """
     src_crs = src_meta["crs"]
-    dst_crs = CRS.from_user_input(dst_crs_str)
+    dst_crs = _crs_from_user_input(dst_crs_str)
     transform, width, height = calculate_default_transform(
         src_crs, dst_crs, src_meta["width"], src_meta["height"],
         *rasterio.transform.array_bounds(
@@ -475,6 +736,7 @@ def reproject_to_crs(src_array, src_meta, dst_crs_str: str, resampling=Resamplin
 
     dst_meta = src_meta.copy()
     dst_meta.update({
+        "driver": "GTiff",
         "crs": dst_crs,
         "transform": transform,
         "width": width,
@@ -482,38 +744,71 @@ def reproject_to_crs(src_array, src_meta, dst_crs_str: str, resampling=Resamplin
     })
 
     count = src_meta.get("count", 1)
-    dtype = src_meta.get("dtype", "float32")
-    import numpy as np
-    dst_array = np.zeros((count, height, width), dtype=dtype)
-
-    for band in range(1, count + 1):
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with rasterio.open(out_path, "w", **dst_meta) as dst:
+        # One warp call for all bands: GDAL sets up the transformer once and
+        # parallelizes the resampling kernels across cores
         reproject(
-            source=src_array[band - 1],
-            destination=dst_array[band - 1],
+            source=src_array,
+            destination=rasterio.band(dst, list(range(1, count + 1))),
             src_transform=src_meta["transform"],
             src_crs=src_crs,
             dst_transform=transform,
             dst_crs=dst_crs,
-            resampling=resampling
+            resampling=resampling,
+            num_threads=os.cpu_count() or 1
         )
-    return dst_array, dst_meta
+    return dst_meta
 
 def write_geotiff(out_path: str, array, meta):
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     meta2 = meta.copy()
-    meta2.update({"driver": "GTiff"})
+    # Compress inside the GeoTIFF (predictor 3 differences float samples,
+    # 2 integer samples, before DEFLATE); the zip step then just stores it
+    predictor = 3 if np.issubdtype(np.dtype(meta.get("dtype", "float32")), np.floating) else 2
+    meta2.update({
+        "driver": "GTiff",
+        "compress": "DEFLATE",
+        "predictor": predictor,
+        "BIGTIFF": "IF_SAFER",
+        # Tiled layout so clients reading sub-windows pay for the window, not
+        # full strips; overviews give them cheap zoomed-out previews
+        "tiled": True,
+        "blockxsize": 512,
+        "blockysize": 512,
+    })
     with rasterio.open(out_path, "w", **meta2) as dst:
         dst.write(array)
+        dst.build_overviews([2, 4, 8, 16], Resampling.average)
+        dst.update_tags(ns="rio_overview", resampling="average")
 
 def zip_outputs(output_paths: list[str], zip_path: str) -> str:
     os.makedirs(os.path.dirname(zip_path), exist_ok=True)
-    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+    # The GeoTIFFs are already DEFLATE-compressed internally; re-deflating
+    # them here burned CPU for a ~1.0 ratio
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as z:
         for p in output_paths:
             arcname = os.path.basename(p)
             z.write(p, arcname=arcname)
     return zip_path
 
 # -------- upload helpers --------
+@lru_cache(maxsize=64)
+def _wgs84_transformer(src_wkt: str) -> Transformer:
+    """Cache transformer construction per source CRS; building the PROJ
+    pipeline is expensive and uploads repeat the same few CRSs."""
+    return Transformer.from_crs(src_wkt, "EPSG:4326", always_xy=True)
+
+def reproject_gdf_to_wgs84(gdf):
+    """Reproject to EPSG:4326 with a cached transformer and one vectorized
+    coordinate pass over the whole geometry column."""
+    transformer = _wgs84_transformer(gdf.crs.to_wkt())
+    geoms = np.array(gdf.geometry.values, dtype=object)
+    coords = shapely.get_coordinates(geoms)
+    x2, y2 = transformer.transform(coords[:, 0], coords[:, 1])
+    gdf = gdf.set_geometry(shapely.set_coordinates(geoms, np.column_stack([x2, y2])))
+    return gdf.set_crs("EPSG:4326", allow_override=True)
+
 def _same_stem(*names: str) -> bool:
     stems = [os.path.splitext(n)[0].lower() for n in names]
     return len(set(stems)) == 1
@@ -564,7 +859,7 @@ def index():
     return render_template('index.html', center_lat=39.5, center_lng=-98.35, zoom=4)
 
 @app.post('/upload_shapefile_parts')
-def upload_shapefile_parts():
+async def upload_shapefile_parts():
     req = request.files
     missing = [k for k in ('shp', 'shx', 'dbf', 'prj') if k not in req or req[k].filename == '']
     if missing:
@@ -585,7 +880,7 @@ def upload_shapefile_parts():
         return 'All four files must share the same basename (e.g., parcels.shp/shx/dbf/prj).', 400
 
     safe_stem = os.path.splitext(secure_filename(shp_f.filename))[0]
-    temp_dir = tempfile.mkdtemp(prefix='shp_parts_')
+    temp_dir = tempfile.mkdtemp(prefix='shp_parts_', dir=SHP_TMPDIR)
     warnings = []
     try:
         shp_path = os.path.join(temp_dir, f'{safe_stem}.shp')
@@ -595,7 +890,10 @@ def upload_shapefile_parts():
         shp_f.save(shp_path); shx_f.save(shx_path); dbf_f.save(dbf_path); prj_f.save(prj_path)
 
         try:
-            gdf = gpd.read_file(shp_path)
+            # Offload the GDAL parse so it does not pin the request worker;
+            # Flask runs async views through asgiref (the flask[async]
+            # extra), so this works under any WSGI server
+            gdf = await asyncio.to_thread(gpd.read_file, shp_path, engine=GPD_ENGINE)
         except Exception as read_err:
             return f'Failed to read shapefile: {read_err}', 400
 
@@ -603,12 +901,19 @@ def upload_shapefile_parts():
             warnings.append('CRS not detected; proceeding as-is. Data may not align with basemap.')
         else:
             try:
-                gdf = gdf.to_crs(epsg=4326)
+                gdf = reproject_gdf_to_wgs84(gdf)
             except Exception as crs_err:
                 warnings.append(f'Failed to reproject to EPSG:4326: {crs_err}. Using original coordinates.')
 
-        geojson_obj = json.loads(gdf.to_json())
-        return jsonify({'layer': {'name': safe_stem, 'geojson': geojson_obj}, 'warnings': warnings})
+        # Embed the GeoJSON string as-is; parsing it back into a dict just so
+        # jsonify can re-serialize it costs two extra passes over the geometry
+        geojson_str = gdf.to_json()
+        payload = (
+            '{"layer":{"name":' + json_dumps(safe_stem)
+            + ',"geojson":' + geojson_str
+            + '},"warnings":' + json_dumps(warnings) + '}'
+        )
+        return Response(payload, mimetype='application/json')
 
     finally:
         try:
@@ -737,9 +1042,8 @@ def process_lidar_job(job_id: str, uploaded_geojson, ranked_datasets, output_crs
         check_cancel_or_deleted()
 
         ext_map = get_dataset_ext(ranked_datasets, LIDAR_EXTENTS_FS0)
-        produced = []
 
-        for dataset in ranked_datasets:
+        def process_dataset(dataset):
             check_cancel_or_deleted()
             ds_name = safe_name(dataset)
             ds_download_dir = os.path.join(downloads_dir, ds_name)
@@ -752,11 +1056,22 @@ def process_lidar_job(job_id: str, uploaded_geojson, ranked_datasets, output_crs
             if not tiles:
                 raise RuntimeError(f"No intersecting tiles found for dataset '{dataset}'.")
 
-            # 2) download/extract each tile zip
-            for path, tile, ext in tiles:
-                check_cancel_or_deleted()
-                tile_url = os.path.join(path, f"{tile}{ext}")
-                download_and_extract_zip(tile_url, ds_download_dir, cancel_event=cancel_event)
+            # 2) download/extract the tile zips in parallel; fetches are
+            # latency-bound so a thread pool overlaps the round trips
+            with ThreadPoolExecutor(max_workers=min(MAX_TILE_THREADS, len(tiles))) as tile_pool:
+                # os.path.join is a filesystem join (backslashes on Windows);
+                # build tile URLs with URL semantics
+                futures = [
+                    tile_pool.submit(
+                        download_and_extract_zip,
+                        urljoin(path if path.endswith("/") else path + "/", f"{tile}{ext}"),
+                        ds_download_dir,
+                        cancel_event,
+                    )
+                    for path, tile, ext in tiles
+                ]
+                for fut in as_completed(futures):
+                    fut.result()
 
             check_cancel_or_deleted()
 
@@ -774,35 +1089,26 @@ def process_lidar_job(job_id: str, uploaded_geojson, ranked_datasets, output_crs
             mosaic_arr, mosaic_transform, mosaic_crs, mosaic_meta = mosaic_rasters_to_array(
                 raster_paths,
                 out_nodata=-9999.0,
-                negative_to_nodata=True
+                negative_to_nodata=True,
+                mask_geoms=mask_geoms,
+                mask_crs=input_crs
             )
 
             check_cancel_or_deleted()
 
-            # 6) reproject
-            reproj_arr, reproj_meta = reproject_to_crs(mosaic_arr, mosaic_meta, output_crs)
+            # 6) reproject straight to a temp GeoTIFF; streaming to disk means
+            # the mosaic, warped, and clipped arrays never coexist in RAM
+            reproj_path = os.path.join(ds_download_dir, f"{ds_name}_reproj.tif")
+            reproj_meta = reproject_to_geotiff(mosaic_arr, mosaic_meta, output_crs, reproj_path)
+            del mosaic_arr
 
             check_cancel_or_deleted()
 
-            mask_geoms_out = [
-                transform_geom(
-                    input_crs.to_string(),
-                    reproj_meta["crs"].to_string(),
-                    g,
-                    precision=6
-                )
-                for g in mask_geoms
-            ]
-
-            # 5) clip
-            
-            clipped_arr, clipped_transform, clipped_meta = clip_array_with_geojson(
-                reproj_arr,
-                reproj_meta["transform"],
-                reproj_meta,
-                reproj_meta["crs"],
-                mask_geoms_out,
-                reproj_meta["crs"]
+            # 5) clip with a windowed read of the reprojected file
+            clipped_arr, clipped_transform, clipped_meta = clip_raster_with_geojson(
+                reproj_path,
+                mask_geoms,
+                input_crs
             )
 
             # clipped_meta.update({"crs": mosaic_crs, "transform": clipped_transform})
@@ -812,22 +1118,27 @@ def process_lidar_job(job_id: str, uploaded_geojson, ranked_datasets, output_crs
             # 7) write tif
             out_tif = os.path.join(outputs_dir, f"{ds_name}.tif")
             write_geotiff(out_tif, clipped_arr, clipped_meta)
-            produced.append(out_tif)
+            return out_tif
+
+        # Datasets are independent; run them in parallel so one dataset's
+        # downloads overlap another's mosaic/reproject CPU work
+        produced = [None] * len(ranked_datasets)
+        with ThreadPoolExecutor(max_workers=min(len(ranked_datasets), 4)) as ds_pool:
+            future_idx = {
+                ds_pool.submit(process_dataset, dataset): i
+                for i, dataset in enumerate(ranked_datasets)
+            }
+            for fut in as_completed(future_idx):
+                produced[future_idx[fut]] = fut.result()
 
         check_cancel_or_deleted()
 
         final_outputs = produced
         if bool(stitch) and len(produced) > 1:
-            
-            stitched_arr, stitched_transform, stitched_crs, stitched_meta = mosaic_rasters_to_array(
-                produced,
-                out_nodata=-9999.0,
-                negative_to_nodata=True
-            )
-
-            stitched_meta.update({"crs": stitched_crs, "transform": stitched_transform})
+            # The per-dataset outputs are already standardized and clipped,
+            # so merge them windowed straight to disk
             stitched_path = os.path.join(outputs_dir, "Stitched_DEMs.tif")
-            write_geotiff(stitched_path, stitched_arr, stitched_meta)
+            mosaic_rasters_to_file(produced, stitched_path, nodata=-9999.0)
             final_outputs = [stitched_path]
 
         zip_path = os.path.join(job_dir, "lidar_outputs.zip")
@@ -853,7 +1164,14 @@ def process_lidar_job(job_id: str, uploaded_geojson, ranked_datasets, output_crs
 # ----------------------------
 @app.post("/download_lidar")
 def download_lidar():
-    data = request.get_json(silent=True) or {}
+    # Decode the body with the fast parser; polygon uploads can run to many
+    # MB of coordinates and dominate the request phase under stdlib json
+    try:
+        data = json_loads(request.get_data(cache=False)) or {}
+    except Exception:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
     arr = data.get("data")
     job_name = data.get("job_name", "")
 
@@ -916,4 +1234,5 @@ if __name__ == '__main__':
     app.run(host=host, port=port, debug=debug_mode, use_reloader=False)
 
 # For production, use a WSGI server such as:
-#   gunicorn -w 4 -b 0.0.0.0:5001 app:app
\ No newline at end of file
+#   gunicorn -w 4 -b 0.0.0.0:5001 app:app
+# (the async upload route needs asgiref installed; see requirements.txt)
\ No newline at end of file
@@ -8,12 +8,26 @@ Created on Tue Aug 22 16:27:44 2023
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
-from glob import glob
-from PIL import Image, ExifTags
+from reportlab.lib.utils import ImageReader
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ExifTags, ImageOps
+from collections import Counter
 from datetime import datetime
+from functools import partial
+import csv
 import os
 import math
-import pandas as pd
+
+
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff')
+
+
+def list_photos(folder):
+    # One scandir pass with cached DirEntry type info; glob plus the .db
+    # re-filter stat'd every entry and still let stray files through
+    with os.scandir(folder) as entries:
+        return sorted(entry.path for entry in entries
+                      if entry.is_file() and entry.name.lower().endswith(PHOTO_EXTENSIONS))
 
 
 def get_timestamp_from_photo(image):
@@ -30,20 +44,29 @@ def get_timestamp_from_photo(image):
 
 
 def rename_photos_and_create_csv(path_to_photos, path_to_csv, well_abbr):
-    photos1 = [f for f in sorted(glob(path_to_photos)) if not f.endswith('.db')]
-    photo_df = pd.DataFrame(columns=["PHOTO NO.", "PHOTOGRAPHER", "DATE", "TIME", "LOCATION WHERE PHOTOGRAPH WAS TAKEN", "COMMENTS (I.E. DESCRIPTION OF WORK AND PURPOSE OF PHOTOGRAPH)"])
-    datelist = []
-    
-    for photo in photos1:
+    photos1 = list_photos(path_to_photos)
+    columns = ["PHOTO NO.", "PHOTOGRAPHER", "DATE", "TIME", "LOCATION WHERE PHOTOGRAPH WAS TAKEN", "COMMENTS (I.E. DESCRIPTION OF WORK AND PURPOSE OF PHOTOGRAPH)"]
+    # Collect plain dicts and build the DataFrame once at the end; pd.concat
+    # inside the loop copied the whole growing frame for every photo
+    rows = []
+    # Same-day sequence numbers; scanning a growing list of date strings per
+    # photo made the numbering quadratic
+    date_counts = Counter()
+    
+    def read_timestamp(photo):
+        with Image.open(photo) as image:
+            return get_timestamp_from_photo(image)
+
+    # EXIF reads only touch the file header, so they are latency-bound;
+    # overlap them in threads while the counter/rename pass below stays
+    # serial to preserve the photo ordering
+    with ThreadPoolExecutor() as executor:
+        timestamps = list(executor.map(read_timestamp, photos1))
+
+    for photo, datetime_str in zip(photos1, timestamps):
         ext = photo.split('.')[-1]
-        image = Image.open(photo)
-        
-        datetime_str = get_timestamp_from_photo(image)
+        filepath = photo
 
-        filepath = image.filename
-        
-        image.close()
-    
         if isinstance(datetime_str, bytes):
               datetime_str = datetime_str.decode()
     
@@ -54,12 +77,9 @@ def rename_photos_and_create_csv(path_to_photos, path_to_csv, well_abbr):
             datetime_obj = datetime.strptime(datetime_str, '%Y:%m:%d %H:%M:%S')
             date_form = datetime_obj.strftime("%Y/%m/%d")
             time_form = datetime_obj.strftime("%I:%M %p")
-    
-            for date in datelist:
-                if date_form == date:
-                    counter += 1
-    
-            datelist.append(date_form)
+
+            date_counts[date_form] += 1
+            counter = date_counts[date_form]
         else:
             date_form = None
             time_form = None
@@ -78,18 +98,32 @@ def rename_photos_and_create_csv(path_to_photos, path_to_csv, well_abbr):
         else:
             new_name = os.path.basename(filepath)
     
-        new_row = pd.DataFrame({
-            "PHOTO NO.": [new_name],
-            "PHOTOGRAPHER": [""],
-            "DATE": ["" if date_form == None else date_form],
-            "TIME": ["" if time_form == None else time_form],
-            "LOCATION WHERE PHOTOGRAPH WAS TAKEN": [""],
-            "COMMENTS (I.E. DESCRIPTION OF WORK AND PURPOSE OF PHOTOGRAPH)": [""]
+        rows.append({
+            "PHOTO NO.": new_name,
+            "PHOTOGRAPHER": "",
+            "DATE": "" if date_form == None else date_form,
+            "TIME": "" if time_form == None else time_form,
+            "LOCATION WHERE PHOTOGRAPH WAS TAKEN": "",
+            "COMMENTS (I.E. DESCRIPTION OF WORK AND PURPOSE OF PHOTOGRAPH)": ""
         })
-        
-        photo_df = pd.concat([photo_df, new_row], ignore_index=True)
-    
-    photo_df.to_csv(path_to_csv)
+
+    with open(path_to_csv, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _load_photo(path, max_px):
+    # Decode and orient one photo off the PDF-writer thread, then shrink it
+    # to what the page cell can actually display at 300 dpi; embedding
+    # full-resolution phone photos made reportlab compress megabytes per
+    # image it renders at roughly 3.5 inches
+    image = Image.open(path)
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_px, max_px), Image.LANCZOS)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    return image
 
 
 def get_image_size(image_path):
@@ -112,41 +146,35 @@ def create_photo_pdf(photo_folder, output_pdf, well_name, proj_num, date, icon_p
     img_cell_height = (height - header - margin - 2 * img_footer) / 2
     img_cell_width = width / 2 - margin
     
-    #photos = glob(photo_folder)
-    photos = [f for f in glob(photo_folder) if not f.endswith('.db')]
-    
-    for count in range(0, len(photos), 4):
-        for count2 in range(4):
-            if count + count2 < len(photos):
-                try:
-                    image=Image.open(photos[count + count2])
-
-                    for orientation in ExifTags.TAGS.keys():
-                        if ExifTags.TAGS[orientation]=='Orientation':
-                            break
-                    
-                    exif = image._getexif()
-                    
-                    if not exif is None:
-
-                        if exif[orientation] == 3:
-                            image=image.rotate(180, expand=True)
-                        elif exif[orientation] == 6:
-                            image=image.rotate(270, expand=True)
-                        elif exif[orientation] == 8:
-                            image=image.rotate(90, expand=True)
-                
-                    image.save(photos[count + count2])
-                    image.close()
-                except (AttributeError, KeyError, IndexError):
-                    # cases: image don't have getexif
-                    pass
-                
-                org_img_width, org_img_height = get_image_size(photos[count + count2])
-                
+    photos = list_photos(photo_folder)
+
+    # Largest dimension a photo can occupy on the page, in pixels at 300 dpi
+    max_px = int(max(img_cell_width, img_cell_height) * 300 / 72)
+
+    # The header repeats verbatim on every page; measure the strings and the
+    # icon once instead of per page
+    well_tw = pdf.stringWidth(well_name, 'Helvetica', 12)
+    proj_tw = pdf.stringWidth(proj_num, 'Helvetica', 12)
+    title_tw = pdf.stringWidth('PHOTOGRAPHIC LOG', 'Helvetica-Oblique', 25)
+    icon_width, icon_height = get_image_size(icon_path)
+    icon_draw_w = icon_width * 75 / icon_height
+    total_pages = math.floor(len(photos) / 4) + 1
+
+    # Decode each page's photos in worker threads; Pillow releases the GIL
+    # for most of the JPEG decode, so the four images of a page load in
+    # parallel while reportlab stitches serially
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for count in range(0, len(photos), 4):
+            page_images = list(executor.map(partial(_load_photo, max_px=max_px),
+                                            photos[count:count + 4]))
+            for count2, image in enumerate(page_images):
+                org_img_width, org_img_height = image.size
+
                 if org_img_width >= org_img_height:
                     img_width = img_cell_width
-                    img_height = org_img_height * img_width / org_img_height
+                    # Was divided by org_img_height, which cancelled to
+                    # img_width and stretched every landscape photo square
+                    img_height = org_img_height * img_width / org_img_width
                 else:
                     img_height = img_cell_height
                     img_width = org_img_width * img_height / org_img_height
@@ -162,44 +190,43 @@ def create_photo_pdf(photo_folder, output_pdf, well_name, proj_num, date, icon_p
                 else:
                     x_org = width / 2
                     y_org = margin
-    
-                
+
+
                 photo_name = os.path.basename(photos[count + count2]).split('.')[0]
                 text_width = pdf.stringWidth(photo_name, 'Helvetica', 12)
                 pdf.setFont('Helvetica', 12)
-    
+
                 btm_lft_x_coord = x_org + ((width - 2 * margin) / 2 - img_width) / 2
                 btm_lft_y_coord = y_org + (img_cell_height - img_height) / 2 + img_footer
-                pdf.drawImage(photos[count + count2], btm_lft_x_coord, btm_lft_y_coord, width=img_width, height=img_height)
+                pdf.drawImage(ImageReader(image), btm_lft_x_coord, btm_lft_y_coord,
+                              width=img_width, height=img_height, preserveAspectRatio=True)
+                image.close()
                 pdf.drawString(x_org + (img_cell_width - text_width) / 2, y_org - 0.25 * img_footer, photo_name)
-            
-        
-        pdf.drawString(x_org + (img_cell_width - text_width) / 2, y_org - 0.25 * img_footer, photo_name)
-        pdf.drawString(x_org + (img_cell_width - text_width) / 2, y_org - 0.25 * img_footer, photo_name)
-        
-        pdf.setFont('Helvetica', 12)
-        text_width = pdf.stringWidth(well_name, 'Helvetica', 12)
-        pdf.drawString(width - margin - text_width, height - margin - 25, well_name)
-        
-        text_width = pdf.stringWidth(proj_num, 'Helvetica', 12)
-        pdf.drawString(width - margin - text_width, height - margin - 40, proj_num)
-        
-        text_width = pdf.stringWidth(f'Page {str(int(count / 4) + 1)} of {str(math.floor(len(photos) / 4))}', 'Helvetica', 12)
-        pdf.drawString(width - margin - text_width, height - margin - 55, f'Page {str(int(count / 4) + 1)} of {str(math.floor(len(photos) / 4) + 1)}')
-
-        # pdf.drawString(margin, height - margin - 35, date)
-        pdf.setLineWidth(3)
-        pdf.setStrokeColorRGB(0.51, 0.02, 0.02)
-        pdf.line(margin, height - margin - 65, width - margin, height - margin - 65)
-        
-        pdf.setFont('Helvetica-Oblique', 25)
-        text_width = pdf.stringWidth('PHOTOGRAPHIC LOG', 'Helvetica-Oblique', 25)
-        pdf.drawString(width - margin - text_width, height - margin - 10, 'PHOTOGRAPHIC LOG')
-        
-        icon_width, icon_height = get_image_size(icon_path)
-        pdf.drawImage(icon_path, margin, height - margin - 55, width=icon_width * 75 / icon_height, height=75)
-        
-        pdf.showPage()
+
+
+            pdf.drawString(x_org + (img_cell_width - text_width) / 2, y_org - 0.25 * img_footer, photo_name)
+            pdf.drawString(x_org + (img_cell_width - text_width) / 2, y_org - 0.25 * img_footer, photo_name)
+
+            pdf.setFont('Helvetica', 12)
+            pdf.drawString(width - margin - well_tw, height - margin - 25, well_name)
+
+            pdf.drawString(width - margin - proj_tw, height - margin - 40, proj_num)
+
+            page_label = f'Page {int(count / 4) + 1} of {total_pages}'
+            text_width = pdf.stringWidth(page_label, 'Helvetica', 12)
+            pdf.drawString(width - margin - text_width, height - margin - 55, page_label)
+
+            # pdf.drawString(margin, height - margin - 35, date)
+            pdf.setLineWidth(3)
+            pdf.setStrokeColorRGB(0.51, 0.02, 0.02)
+            pdf.line(margin, height - margin - 65, width - margin, height - margin - 65)
+
+            pdf.setFont('Helvetica-Oblique', 25)
+            pdf.drawString(width - margin - title_tw, height - margin - 10, 'PHOTOGRAPHIC LOG')
+
+            pdf.drawImage(icon_path, margin, height - margin - 55, width=icon_draw_w, height=75)
+
+            pdf.showPage()
     pdf.save()
 
 
@@ -210,7 +237,7 @@ proj_num = '419.23.200'
 date = '02/26/2025'
 
 icon_path = '.\\New Logo_Blue_90.tif'
-photo_folder = '.\\Photos\\*'
+photo_folder = '.\\Photos'
 output_pdf = '.\\photoLog.pdf'
 output_csv = '.\\photoLog.csv'
 